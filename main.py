@@ -2,9 +2,9 @@
 focus-ai: a productivity coach that monitors your active window
 and provides audio feedback to keep you focused and motivated.
 
-This script continuously checks the currently active window, sends the current
-window and recent window history to OpenAI's GPT-3.5-turbo model, generates
-a short motivational response, and plays it back.
+This script watches for active-window changes, sends the current window and
+recent window history to OpenAI's gpt-4o-mini model (or answers known apps
+locally), generates a short motivational response, and plays it back.
 
 Key components:
 - PyAutoGUI: For getting the active window title
@@ -16,21 +16,104 @@ The script runs indefinitely to provide real-time feedback
 to keep you focused and productive.
 """
 
+from __future__ import annotations
+
+import asyncio
 import time
 import os
+import functools
+import hashlib
+import json
 import logging
-from typing import List, Dict, Optional
+import platform
+import queue
+import random
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Iterable, List, Dict, Optional, Set, Tuple
+import diskcache
+import numpy as np
 import pyautogui
-import pyaudio
-from openai import OpenAI
-from pyht import Client
-from pyht.client import TTSOptions
 from dotenv import load_dotenv
 
+
+# The heavy SDK imports (openai, pyht, pyaudio, numba) are deferred behind
+# cached factories so code paths that never touch them — and anything that
+# just imports this module — don't pay their import cost.
+
+@functools.cache
+def _async_openai_cls():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI
+
+
+@functools.cache
+def _pyaudio_module():
+    import pyaudio
+    return pyaudio
+
+
+@functools.cache
+def _pyht():
+    from pyht import Client
+    from pyht.client import TTSOptions
+    return Client, TTSOptions
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# A sentence boundary is sentence-ending punctuation followed by whitespace.
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Leading-silence detection: windowed RMS threshold and window length (8ms at 20kHz).
+SILENCE_RMS_THRESHOLD = 500
+SILENCE_WINDOW_SAMPLES = 160
+
+
+@functools.cache
+def _first_nonsilence_fn():
+    """Build the silence scanner, JIT-compiled when Numba is available.
+
+    Importing and compiling Numba is itself expensive, so it happens on
+    first use rather than at module import.
+    """
+    try:
+        from numba import njit
+    except ImportError:  # Numba is optional; fall back to the pure-Python loop.
+        def njit(*_args, **_kwargs):
+            def decorator(func):
+                return func
+            return decorator
+
+    @njit(cache=True)
+    def first_nonsilence(pcm: np.ndarray, thresh: int, win: int) -> int:
+        """Return the index of the first sample window whose RMS exceeds thresh.
+
+        Uses a running sum of squares so the scan is a single pass. Returns 0
+        when the audio starts loud or never exceeds the threshold.
+        """
+        if pcm.size < win:
+            return 0
+        limit = float(thresh) * float(thresh) * win
+        sumsq = 0.0
+        for i in range(win):
+            sample = float(pcm[i])
+            sumsq += sample * sample
+        if sumsq >= limit:
+            return 0
+        for i in range(win, pcm.size):
+            new = float(pcm[i])
+            old = float(pcm[i - win])
+            sumsq += new * new - old * old
+            if sumsq >= limit:
+                return i - win + 1
+        return 0
+
+    return first_nonsilence
+
+
 class Config:
     """Configuration management class."""
     def __init__(self):
@@ -42,14 +125,23 @@ class Config:
         if not all([self.openai_api_key, self.playht_api_key, self.playht_user_id]):
             raise ValueError("Missing required environment variables")
 
-config = Config()
-
 
 class WindowManager:
     """Manages window-related operations."""
+    TITLE_BUFFER_SIZE: int = 512
+
     def __init__(self, max_history: int = 5):
-        self.last_windows: List[str] = []
+        self.last_windows: Deque[str] = deque(maxlen=max_history)
         self.max_history: int = max_history
+        # On Windows, bind the Win32 functions and preallocate the title
+        # buffer once instead of paying pyautogui's per-call ctypes setup.
+        self._user32 = None
+        if platform.system() == "Windows":
+            import ctypes
+            self._user32 = ctypes.windll.user32
+            self._title_buf = ctypes.create_unicode_buffer(self.TITLE_BUFFER_SIZE)
+            self._get_foreground_window = self._user32.GetForegroundWindow
+            self._get_window_text = self._user32.GetWindowTextW
 
     def get_current_window(self) -> str:
         """
@@ -58,6 +150,10 @@ class WindowManager:
         Returns:
             str: The title of the active window or "Unknown" if not found.
         """
+        if self._user32 is not None:
+            hwnd = self._get_foreground_window()
+            length = self._get_window_text(hwnd, self._title_buf, self.TITLE_BUFFER_SIZE)
+            return self._title_buf[:length] or "Unknown"
         try:
             return pyautogui.getActiveWindow().title
         except AttributeError:
@@ -67,57 +163,520 @@ class WindowManager:
         """
         Update the list of last focused windows.
 
+        The deque's maxlen evicts the oldest entry automatically in O(1).
+
         Args:
             window_name (str): The name of the current window to add to the list.
         """
         self.last_windows.append(window_name)
-        if len(self.last_windows) > self.max_history:
-            self.last_windows.pop(0)
+
+
+class WindowWatcher:
+    """Delivers active-window changes as events instead of busy polling.
+
+    On Windows this installs a WinEvent hook so the OS notifies us on each
+    foreground change and the process sleeps otherwise. On other platforms
+    it falls back to a background polling thread; either way consumers just
+    block on `events()`.
+    """
+
+    POLL_INTERVAL: float = 0.5
+    DEBOUNCE_SECONDS: float = 1.5  # how long focus must settle before an event fires
+
+    def __init__(self, window_manager: WindowManager):
+        self.window_manager = window_manager
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start delivering window-change events on a background thread."""
+        if platform.system() == "Windows":
+            target = self._run_win32_hook
+        else:
+            target = self._run_poll_loop
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def _get_settled(self) -> str:
+        """Block for the next event, then absorb the burst until focus settles.
+
+        Alt-Tabbing through several windows emits an event per transient
+        focus; only the window the user lands on for DEBOUNCE_SECONDS is
+        worth a GPT + TTS round-trip, so keep draining until the queue stays
+        quiet and return the last title seen.
+        """
+        current = self._queue.get()
+        while True:
+            try:
+                current = self._queue.get(timeout=self.DEBOUNCE_SECONDS)
+            except queue.Empty:
+                return current
+
+    def events(self):
+        """Yield window titles as focus settles, blocking between events."""
+        while True:
+            yield self._get_settled()
+
+    async def aevents(self) -> AsyncIterator[str]:
+        """Async variant of events(); waits without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            yield await loop.run_in_executor(None, self._get_settled)
+
+    def _run_poll_loop(self) -> None:
+        """Fallback: poll the active window and enqueue changes."""
+        last: Optional[str] = None
+        while True:
+            current = self.window_manager.get_current_window()
+            if current != last:
+                self._queue.put(current)
+                last = current
+            time.sleep(self.POLL_INTERVAL)
+
+    def _run_win32_hook(self) -> None:
+        """Windows: receive EVENT_SYSTEM_FOREGROUND notifications from the OS."""
+        import ctypes
+        import ctypes.wintypes
+
+        EVENT_SYSTEM_FOREGROUND = 0x0003
+        WINEVENT_OUTOFCONTEXT = 0x0000
+
+        user32 = ctypes.windll.user32
+        WinEventProcType = ctypes.WINFUNCTYPE(
+            None,
+            ctypes.wintypes.HANDLE,
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.HWND,
+            ctypes.wintypes.LONG,
+            ctypes.wintypes.LONG,
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.DWORD,
+        )
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, event_time):
+            length = user32.GetWindowTextLengthW(hwnd)
+            buf = ctypes.create_unicode_buffer(length + 1)
+            user32.GetWindowTextW(hwnd, buf, length + 1)
+            self._queue.put(buf.value or "Unknown")
+
+        # Keep a reference so the C callback isn't garbage collected.
+        self._win_event_proc = WinEventProcType(callback)
+        hook = user32.SetWinEventHook(
+            EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND,
+            0, self._win_event_proc, 0, 0, WINEVENT_OUTOFCONTEXT
+        )
+        if not hook:
+            logger.error("SetWinEventHook failed, falling back to polling")
+            self._run_poll_loop()
+            return
+
+        # The hook only fires while this thread pumps messages.
+        msg = ctypes.wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) != 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+
+class FastClassifier:
+    """Classifies window titles locally so common cases never reach the LLM.
+
+    Known distracting and productive apps are matched with precompiled
+    regexes and answered from a pool of pre-written sergeant lines; only
+    unknown titles fall through to GPT.
+    """
+
+    DISTRACTING_RE = re.compile(r'(?i)(youtube|x\.com|twitter|reddit|tiktok|instagram|facebook)')
+    PRODUCTIVE_RE = re.compile(r'(?i)(vs ?code|visual studio|pycharm|terminal|vim|sublime|xcode)')
+    LINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "canned_lines.json")
+
+    def __init__(self):
+        with open(self.LINES_PATH, encoding="utf-8") as f:
+            self.lines: Dict[str, List[str]] = json.load(f)
+
+    def classify(self, window_name: str) -> Optional[str]:
+        """
+        Classify a window title.
+
+        Args:
+            window_name (str): The title of the window to classify.
+
+        Returns:
+            Optional[str]: "distracting", "productive", or None if unknown.
+        """
+        if self.DISTRACTING_RE.search(window_name):
+            return "distracting"
+        if self.PRODUCTIVE_RE.search(window_name):
+            return "productive"
+        return None
+
+    def pick_line(self, category: str) -> str:
+        """Pick a random canned line for a category."""
+        return random.choice(self.lines[category])
 
 
 class OpenAIManager:
     """Manages interactions with OpenAI API."""
+
+    SYSTEM_PROMPT: str = (
+        "Act as a productivity military coach. "
+        "You are strict, ironic, sarcastic with the user and will go to extreme lengths to encourage them to work. "
+        "Give max ONE SENTENCE SHORT replies only. "
+        "Make it like a game's mission. "
+        "The user will tell you their current window and last windows. "
+        "Carefully read and understand the current window, if it is social media like youtube or x.com then SCREAM at them to motivate them to focus on productive work. "
+        "Otherwise, encourage and compliment them like an army sergeant. "
+        "Add excess of punctuation to clearly indicate audio tone, your output will be used for text-to-speech."
+    )
+
+    MODEL: str = "gpt-4o-mini"
+    MAX_COMPLETION_TOKENS: int = 40  # one sergeant sentence fits well under this
+
+    CACHE_MAX_ENTRIES: int = 256
+    ERROR_CACHE_TTL: float = 30.0  # seconds before a failed lookup is retried
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    SEMANTIC_THRESHOLD: float = 0.92  # cosine similarity needed for a semantic hit
+    SEMANTIC_MAX_ENTRIES: int = 512
+
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_KEEPALIVE_CONNECTIONS: int = 4
+    HTTP_KEEPALIVE_EXPIRY: float = 600.0  # keep connections warm across quiet periods
+
     def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+        import httpx
+        # A long keepalive window plus HTTP/2 multiplexing keeps the TLS
+        # handshake (~100-300ms) off every call after the first.
+        http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=self.HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_keepalive_connections=self.HTTP_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=self.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self.client = _async_openai_cls()(api_key=api_key, http_client=http_client)
+        # LRU cache: (current_window, tuple(last_windows)) -> (response, timestamp, is_error)
+        self._cache: "OrderedDict[Tuple, Tuple[Dict[str, str], float, bool]]" = OrderedDict()
+        # Semantic cache: unit-normalized embeddings (one row per cached context)
+        # with a parallel list of responses, so a lookup is a single matmul.
+        self._emb: Optional[np.ndarray] = None
+        self._texts: List[Dict[str, str]] = []
+
+    async def _embed(self, context: str) -> Optional[np.ndarray]:
+        """Fetch a unit-normalized embedding for a context string, or None on failure."""
+        try:
+            response = await self.client.embeddings.create(model=self.EMBEDDING_MODEL, input=context)
+            vec = np.asarray(response.data[0].embedding, dtype=np.float32)
+            return vec / np.linalg.norm(vec)
+        except Exception as e:
+            logger.error("Error fetching embedding: %s", e)
+            return None
+
+    def _semantic_get(self, query: np.ndarray) -> Optional[Dict[str, str]]:
+        """Return the cached response most similar to query, if above threshold."""
+        if self._emb is None or len(self._texts) == 0:
+            return None
+        sims = self._emb @ query
+        best = int(np.argmax(sims))
+        if sims[best] < self.SEMANTIC_THRESHOLD:
+            return None
+        # Move the hit to the end so eviction drops the least recently used row.
+        row = self._emb[best]
+        text = self._texts.pop(best)
+        self._emb = np.vstack([np.delete(self._emb, best, axis=0), row])
+        self._texts.append(text)
+        return text
+
+    def _semantic_put(self, query: np.ndarray, response: Dict[str, str]) -> None:
+        """Append a context embedding and its response, evicting the oldest row."""
+        if self._emb is None:
+            self._emb = query[np.newaxis, :]
+        else:
+            self._emb = np.vstack([self._emb, query])
+        self._texts.append(response)
+        if len(self._texts) > self.SEMANTIC_MAX_ENTRIES:
+            self._emb = np.delete(self._emb, 0, axis=0)
+            self._texts.pop(0)
+
+    def _cache_get(self, key: Tuple) -> Optional[Dict[str, str]]:
+        """Return a cached response for key, expiring stale error entries."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        response, timestamp, is_error = entry
+        if is_error and time.time() - timestamp > self.ERROR_CACHE_TTL:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return response
+
+    def _cache_put(self, key: Tuple, response: Dict[str, str], is_error: bool = False) -> None:
+        """Store a response in the cache, evicting the least recently used entry."""
+        self._cache[key] = (response, time.time(), is_error)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    async def _lookup(self, key: Tuple, context: str) -> Tuple[Optional[Dict[str, str]], Optional[np.ndarray]]:
+        """Check the exact then semantic caches.
 
-    def get_response(self, current_window: str, last_windows: List[str]) -> Dict[str, str]:
+        Returns:
+            Tuple of (cached response or None, context embedding or None).
+            The embedding is returned so a miss can be stored without
+            re-embedding the context.
+        """
+        cached = self._cache_get(key)
+        if cached is not None:
+            logger.debug("Cache hit for window state: %s", key[0])
+            return cached, None
+
+        # Near-duplicate contexts ("Document1 - Word" vs "Document2 - Word")
+        # miss the exact cache but are semantically identical; reuse via embeddings.
+        query = await self._embed(context)
+        if query is not None:
+            semantic = self._semantic_get(query)
+            if semantic is not None:
+                logger.debug("Semantic cache hit for window state: %s", key[0])
+                self._cache_put(key, semantic)
+                return semantic, query
+        return None, query
+
+    def _store(self, key: Tuple, query: Optional[np.ndarray], result: Dict[str, str]) -> None:
+        """Record a successful response in both caches."""
+        self._cache_put(key, result)
+        if query is not None:
+            self._semantic_put(query, result)
+
+    def _build_messages(self, current_window: str, last_windows: List[str]) -> List[Dict[str, str]]:
+        """Build the chat messages for a coaching request.
+
+        The instructions live in a fixed system message so identical request
+        prefixes hit OpenAI's server-side prompt cache; only the short user
+        message varies per call.
+        """
+        history = ", ".join(last_windows)
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": f"Current window: {current_window}; last windows: {history}"},
+        ]
+
+    async def get_response(self, current_window: str, last_windows: List[str],
+                           fresh: bool = False) -> Dict[str, str]:
         """
         Get response from OpenAI based on current and last focused windows.
 
+        Responses are cached in memory so toggling between the same windows
+        (e.g. editor and browser) does not trigger a new API round-trip.
+
         Args:
             current_window (str): The name of the currently focused window.
             last_windows (List[str]): List of previously focused windows.
+            fresh (bool): Skip the cache lookup and force a new completion
+                (the result is still stored).
 
         Returns:
             Dict[str, str]: A dictionary containing the text to speak.
         """
-        prompt_text = f"""Act as a productivity military coach.
-        You are strict, ironic, sarcastic with the user and will go to extreme lengths to encourage them to work.
-        Give max ONE SENTENCE SHORT replies only.
-        Make it like a game's mission.
-        User's current window is: {current_window} and last windows are: {last_windows}.
-        Carefully read and understand the current window, if it is social media like youtube or x.com then SCREAM at them to motivate them to focus on productive work. 
-        Otherwise, encourage and compliment them like an army sergeant.
-        Add excess of punctuation to clearly indicate audio tone, your output will be used for text-to-speech."""
+        key = (current_window, tuple(last_windows))
+        context = f"current: {current_window}; history: {', '.join(last_windows)}"
+        query: Optional[np.ndarray] = None
+        if not fresh:
+            cached, query = await self._lookup(key, context)
+            if cached is not None:
+                return cached
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "system", "content": prompt_text}],
-                max_tokens=150,
+            response = await self.client.chat.completions.create(
+                model=self.MODEL,
+                messages=self._build_messages(current_window, last_windows),
+                max_tokens=self.MAX_COMPLETION_TOKENS,
                 temperature=0.7
             )
-            return {"say": response.choices[0].message.content}
+            result = {"say": response.choices[0].message.content}
+            self._store(key, query, result)
+            return result
+        except Exception as e:
+            logger.error("Error getting OpenAI response: %s", e)
+            fallback = {"say": "Soldier, we're experiencing technical difficulties. Stay focused!"}
+            # Negative-cache the failure so repeated errors don't hammer the API.
+            self._cache_put(key, fallback, is_error=True)
+            return fallback
+
+    async def stream_response(self, current_window: str, last_windows: List[str]) -> AsyncIterator[str]:
+        """
+        Stream a response from OpenAI sentence by sentence.
+
+        Tokens are consumed as they arrive and yielded as complete sentences,
+        so TTS playback can begin before the completion has finished. Cache
+        hits yield the full cached text immediately.
+
+        Args:
+            current_window (str): The name of the currently focused window.
+            last_windows (List[str]): List of previously focused windows.
+
+        Yields:
+            str: Complete sentences of the response, in order.
+        """
+        key = (current_window, tuple(last_windows))
+        context = f"current: {current_window}; history: {', '.join(last_windows)}"
+        cached, query = await self._lookup(key, context)
+        if cached is not None:
+            yield cached["say"]
+            return
+
+        sentences: List[str] = []
+        buffer = ""
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.MODEL,
+                messages=self._build_messages(current_window, last_windows),
+                max_tokens=self.MAX_COMPLETION_TOKENS,
+                temperature=0.7,
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                buffer += delta
+                while True:
+                    match = SENTENCE_BOUNDARY_RE.search(buffer)
+                    if match is None:
+                        break
+                    sentence, buffer = buffer[:match.start()], buffer[match.end():]
+                    sentences.append(sentence)
+                    yield sentence
+            if buffer.strip():
+                sentences.append(buffer)
+                yield buffer
+            self._store(key, query, {"say": " ".join(sentences)})
         except Exception as e:
-            logger.error(f"Error getting OpenAI response: {e}")
-            return {"say": "Soldier, we're experiencing technical difficulties. Stay focused!"}
+            logger.error("Error streaming OpenAI response: %s", e)
+            fallback = {"say": "Soldier, we're experiencing technical difficulties. Stay focused!"}
+            # Negative-cache the failure so repeated errors don't hammer the API.
+            self._cache_put(key, fallback, is_error=True)
+            if not sentences:
+                yield fallback["say"]
 
 
 class TTSManager:
     """Manages text-to-speech operations."""
+
+    CACHE_DIR = os.path.expanduser("~/.focus-ai/tts")
+    CACHE_SIZE_LIMIT = 500 * 1024 * 1024  # 500MB, LRU-evicted by diskcache
+    # Batch size for stream writes: 8x the 2048-byte callback buffer
+    # (1024 frames x 2 bytes), safely below pyaudio's internal queue.
+    WRITE_COALESCE_BYTES = 16384
+
     def __init__(self, user_id: str, api_key: str):
+        pyaudio = _pyaudio_module()
+        Client, TTSOptions = _pyht()
         self.tts = Client(user_id=user_id, api_key=api_key)
         self.p = pyaudio.PyAudio()
+        # Voice parameters never change at runtime; build them once.
+        self.options = TTSOptions(
+            voice="s3://voice-cloning-zero-shot/cebaa3cf-d1d5-4625-ba20-03dcca3b379f/sargesaad/manifest.json",
+            voice_guidance=6,
+            text_guidance=0,
+            speed=1.2,
+            sample_rate=20000
+        )
+        # Persistent PCM cache: the same sentence spoken twice (even across
+        # restarts) plays from disk instead of hitting Play.ht again.
+        self.cache = diskcache.Cache(self.CACHE_DIR, size_limit=self.CACHE_SIZE_LIMIT)
+        # Open the output device once; re-opening per utterance costs
+        # 20-100ms of PortAudio/driver setup each time.
+        self.audio_stream = self.p.open(
+            format=pyaudio.paInt16, channels=1, rate=20000, output=True,
+            frames_per_buffer=1024
+        )
+
+    def close(self) -> None:
+        """Release the audio device."""
+        self.audio_stream.stop_stream()
+        self.audio_stream.close()
+        self.p.terminate()
+
+    @staticmethod
+    def _trim_leading_silence(buf: bytearray) -> None:
+        """Drop leading near-silent samples from an int16 PCM buffer in place.
+
+        Play.ht returns variable leading silence; scanning for the first
+        window above the RMS threshold removes 100-300ms of dead air per
+        utterance.
+        """
+        usable = len(buf) // 2 * 2
+        if usable == 0:
+            return
+        arr = np.frombuffer(bytes(buf[:usable]), dtype=np.int16)
+        start = int(_first_nonsilence_fn()(arr, SILENCE_RMS_THRESHOLD, SILENCE_WINDOW_SAMPLES))
+        del buf[:start * 2]
+
+    @staticmethod
+    def _cache_key(text: str, options: TTSOptions) -> bytes:
+        """Derive a cache key from the text and the voice parameters."""
+        params = (f"{text}|{options.voice}|{options.voice_guidance}"
+                  f"|{options.text_guidance}|{options.speed}|{options.sample_rate}")
+        return hashlib.sha256(params.encode()).digest()
+
+    def synthesize(self, text: str) -> bytes:
+        """
+        Synthesize text to raw PCM bytes, caching the result on disk.
+
+        Args:
+            text (str): The text to synthesize.
+
+        Returns:
+            bytes: Raw int16 PCM audio for the text.
+        """
+        key = self._cache_key(text, self.options)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        buf = bytearray()
+        for chunk in self.tts.tts(text, self.options):
+            buf.extend(chunk)
+        self._trim_leading_silence(buf)
+        pcm = bytes(buf)
+        self.cache[key] = pcm
+        return pcm
+
+    def warmup(self) -> None:
+        """Force voice-manifest resolution and the TLS handshake up front.
+
+        The Play.ht SDK resolves the voice manifest and opens its connection
+        lazily on first use; doing it at startup means the first real
+        utterance is as fast as the rest.
+        """
+        try:
+            next(iter(self.tts.tts(" ", self.options)), None)
+        except Exception as e:
+            logger.error("Error warming up TTS: %s", e)
+
+    def prefetch(self, texts: Iterable[str]) -> None:
+        """Warm the PCM cache in the background so canned lines play with zero network."""
+        def worker() -> None:
+            self.warmup()
+            for text in texts:
+                try:
+                    self.synthesize(text)
+                except Exception as e:
+                    logger.error("Error prefetching TTS audio: %s", e)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def speak_cached(self, text: str) -> None:
+        """
+        Play text from the PCM cache, synthesizing it first on a miss.
+
+        Args:
+            text (str): The text to be spoken.
+        """
+        logger.info("Speaking: %s", text)
+        try:
+            self.audio_stream.write(self.synthesize(text))
+        except Exception as e:
+            logger.error("Error in text-to-speech: %s", e)
 
     def speak_text(self, text: str) -> None:
         """
@@ -126,61 +685,173 @@ class TTSManager:
         Args:
             text (str): The text to be spoken.
         """
-        logger.info(f"Speaking: {text}")
-        text = "   " + text  # Add leading spaces for better speech timing
-        options = TTSOptions(
-            voice="s3://voice-cloning-zero-shot/cebaa3cf-d1d5-4625-ba20-03dcca3b379f/sargesaad/manifest.json",
-            voice_guidance=6,
-            text_guidance=0,
-            speed=1.2,
-            sample_rate=20000
-        )
+        self.speak_stream([text])
 
+    def speak_stream(self, texts: Iterable[str]) -> None:
+        """
+        Play an incoming stream of text pieces as they arrive.
+
+        The shared output stream is reused across utterances; each piece
+        is synthesized and played while later pieces are still being
+        produced, so playback overlaps generation.
+
+        Args:
+            texts (Iterable[str]): Sentences or fragments to speak, in order.
+        """
         try:
-            audio_stream = self.p.open(format=pyaudio.paInt16, channels=1, rate=20000, output=True)
-            for chunk in self.tts.tts(text, options):
-                audio_stream.write(chunk)
-            audio_stream.stop_stream()
-            audio_stream.close()
+            for text in texts:
+                logger.info("Speaking: %s", text)
+                key = self._cache_key(text, self.options)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    self.audio_stream.write(cached)
+                    continue
+                # Coalesce the small network chunks into larger writes: one
+                # syscall and ring-buffer copy per ~16KB instead of per chunk.
+                # The first flush is held until enough audio has arrived to
+                # locate where speech starts, so the leading dead air that
+                # Play.ht prepends is never played.
+                buf = bytearray()
+                written = 0
+                trimmed = False
+                for chunk in self.tts.tts(text, self.options):
+                    buf.extend(chunk)
+                    if not trimmed:
+                        if len(buf) < self.WRITE_COALESCE_BYTES:
+                            continue
+                        self._trim_leading_silence(buf)
+                        trimmed = True
+                    if len(buf) - written >= self.WRITE_COALESCE_BYTES:
+                        self.audio_stream.write(bytes(buf[written:]))
+                        written = len(buf)
+                if not trimmed:
+                    self._trim_leading_silence(buf)
+                if written < len(buf):
+                    self.audio_stream.write(bytes(buf[written:]))
+                self.cache[key] = bytes(buf)
         except Exception as e:
-            logger.error(f"Error in text-to-speech: {e}")
+            logger.error("Error in text-to-speech: %s", e)
 
 
 class FocusAI:
     """Main class for the productivity coach application."""
+
+    SPECULATIVE_DELAY: float = 10.0  # settle time before prefetching the next line
+
     def __init__(self):
+        self.config = Config()
         self.window_manager = WindowManager()
-        self.openai_manager = OpenAIManager(config.openai_api_key)
-        self.tts_manager = TTSManager(config.playht_user_id, config.playht_api_key)
+        self.window_watcher = WindowWatcher(self.window_manager)
+        self.classifier = FastClassifier()
+        self.openai_manager = OpenAIManager(self.config.openai_api_key)
+        self.tts_manager = TTSManager(self.config.playht_user_id, self.config.playht_api_key)
         self.last_focused_window: Optional[str] = None
+        self._producers: Set[asyncio.Task] = set()
+        # One speculative (window, text) pair whose PCM is already synthesized.
+        self._speculative: Optional[Tuple[str, str]] = None
+        self._speculative_task: Optional[asyncio.Task] = None
+
+    async def _produce(self, current_window: str, last_windows: List[str],
+                       sentence_queue: "queue.Queue[Optional[str]]") -> None:
+        """Pump streamed sentences into a thread-safe queue for the speaker."""
+        try:
+            async for sentence in self.openai_manager.stream_response(current_window, last_windows):
+                sentence_queue.put(sentence)
+        finally:
+            sentence_queue.put(None)  # Sentinel: utterance complete.
+
+    async def _prefetch_speculative(self, current_window: str, last_windows: List[str]) -> None:
+        """Pre-generate the next line for a window the user has settled on.
+
+        Once the user has stayed put for SPECULATIVE_DELAY seconds, fetch a
+        fresh response and pre-synthesize its audio, so tabbing away and back
+        to this window plays instantly with zero network calls.
+        """
+        await asyncio.sleep(self.SPECULATIVE_DELAY)
+        if current_window != self.last_focused_window:
+            return
+        try:
+            response = await self.openai_manager.get_response(current_window, last_windows, fresh=True)
+            text = response["say"]
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.tts_manager.synthesize, text)
+            self._speculative = (current_window, text)
+        except Exception as e:
+            logger.error("Error prefetching speculative response: %s", e)
 
-    def run(self) -> None:
+    async def _speak(self, speech_queue: "asyncio.Queue[Tuple[str, object]]") -> None:
+        """Play queued utterances one at a time without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            kind, payload = await speech_queue.get()
+            # pyaudio is blocking, so playback runs in a worker thread while
+            # the loop keeps fetching the next response.
+            if kind == "canned":
+                await loop.run_in_executor(None, self.tts_manager.speak_cached, payload)
+            else:
+                await loop.run_in_executor(
+                    None, self.tts_manager.speak_stream, iter(payload.get, None)
+                )
+
+    async def run(self) -> None:
         """
         Main function to run focus ai.
-        Continuously monitors the active window and provides audio feedback.
+        Blocks on window-change events and provides audio feedback for each.
+        The LLM request for a new window runs concurrently with playback of
+        the previous utterance.
         """
         logger.info("Starting Focus AI")
-        time.sleep(1)
-
-        while True:
-            try:
-                current_window = self.window_manager.get_current_window()
-                logger.debug(f"Current window: {current_window}")
-
-                if current_window != self.last_focused_window:
-                    logger.info(f"Window changed: {current_window}")
-                    self.window_manager.update_window_list(current_window)
-                    response = self.openai_manager.get_response(current_window, self.window_manager.last_windows)
-                    say_text = response['say']
-                    self.tts_manager.speak_text(say_text)
-                    self.last_focused_window = current_window
+        await asyncio.sleep(1)
 
-                time.sleep(0.5)
-            except Exception as e:
-                logger.error(f"Unexpected error in main loop: {e}")
-                time.sleep(5)  # Wait longer if there's an error
+        self.window_watcher.start()
+        # Pre-synthesize the canned lines so classifier hits play with zero
+        # network calls in the hot path.
+        self.tts_manager.prefetch(
+            line for lines in self.classifier.lines.values() for line in lines
+        )
+        speech_queue: "asyncio.Queue[Tuple[str, object]]" = asyncio.Queue()
+        speaker = asyncio.create_task(self._speak(speech_queue))
+        try:
+            async for current_window in self.window_watcher.aevents():
+                try:
+                    logger.debug("Current window: %s", current_window)
+
+                    if current_window != self.last_focused_window:
+                        logger.info("Window changed: %s", current_window)
+                        self.window_manager.update_window_list(current_window)
+                        speculative = self._speculative
+                        category = self.classifier.classify(current_window)
+                        if speculative is not None and speculative[0] == current_window:
+                            logger.debug("Serving speculative prefetch")
+                            self._speculative = None
+                            await speech_queue.put(("canned", speculative[1]))
+                        elif category is not None:
+                            logger.debug("Classifier hit (%s), skipping LLM", category)
+                            await speech_queue.put(("canned", self.classifier.pick_line(category)))
+                        else:
+                            sentence_queue: "queue.Queue[Optional[str]]" = queue.Queue()
+                            producer = asyncio.create_task(self._produce(
+                                current_window, list(self.window_manager.last_windows), sentence_queue
+                            ))
+                            self._producers.add(producer)
+                            producer.add_done_callback(self._producers.discard)
+                            await speech_queue.put(("stream", sentence_queue))
+                        self.last_focused_window = current_window
+
+                        # At most one outstanding speculative prefetch, for
+                        # whichever window the user settled on most recently.
+                        if self._speculative_task is not None and not self._speculative_task.done():
+                            self._speculative_task.cancel()
+                        self._speculative_task = asyncio.create_task(self._prefetch_speculative(
+                            current_window, list(self.window_manager.last_windows)
+                        ))
+                except Exception as e:
+                    logger.error("Unexpected error in main loop: %s", e)
+                    await asyncio.sleep(5)  # Wait longer if there's an error
+        finally:
+            speaker.cancel()
 
 
 if __name__ == "__main__":
     focus_ai = FocusAI()
-    focus_ai.run()
+    asyncio.run(focus_ai.run())